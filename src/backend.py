@@ -1,13 +1,15 @@
+import mmap
 import sys
+from typing import Union
 
 from src.definition import Variable, Statement, Assignment, Print, SourceCode, Procedure
-from src.lexer import Lexer
+from src.lexer import Lexer, map_source_file
 from src.parser import parse
 
 
 class Interpreter:
 
-    def __init__(self, source_code: str):
+    def __init__(self, source_code: Union[str, bytes, mmap.mmap]):
         self.lexer = Lexer(source_code)
         self.ast = parse(self.lexer)
         self.variables = {}
@@ -53,10 +55,9 @@ class Interpreter:
 
 def main():
     source_file = './test.sql'
-    with open(source_file) as f:
-        source_code = f.read()
-    interpreter = Interpreter(source_code)
-    interpreter.execute()
+    with map_source_file(source_file) as source_code:
+        interpreter = Interpreter(source_code)
+        interpreter.execute()
 
 
 if __name__ == '__main__':
@@ -1,36 +1,124 @@
+import mmap
 from abc import ABC
 from collections import namedtuple
-from typing import List
+from typing import List, Optional
 
 
-class Variable:
+SOURCE_ENCODING = 'utf-8'
 
-    def __init__(self, line_num: int, name: str):
+
+class Span:
+    """[start, end) offsets into the source, bytes offsets for a mapped file"""
+    __slots__ = ('source', 'start', 'end')
+
+    def __init__(self, source, start: int, end: int):
+        self.source = source
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self) -> str:
+        if isinstance(self.source, mmap.mmap) and self.source.closed:
+            raise ValueError('Span.text: source mapping is closed, '
+                             'the AST must not outlive map_source_file()')
+        text = self.source[self.start:self.end]
+        if isinstance(text, str):
+            return text
+        if isinstance(text, memoryview):
+            text = bytes(text)
+        return text.decode(SOURCE_ENCODING)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return 'Span({}, {})'.format(self.start, self.end)
+
+
+class Node:
+    """keeps start and length instead of a Span per node, short lengths are shared small ints"""
+    __slots__ = ('source', 'start', 'length')
+
+    def __init__(self, span: Optional[Span] = None):
+        if span is None:
+            self.source = self.start = self.length = None
+        else:
+            self.source = span.source
+            self.start = span.start
+            self.length = len(span)
+
+    @property
+    def span(self) -> Optional[Span]:
+        if self.start is None:
+            return None
+        return Span(self.source, self.start, self.start + self.length)
+
+
+class Variable(Node):
+    __slots__ = ('line_num', '_name')
+
+    def __init__(self, line_num: int, name: Optional[str] = None, span: Optional[Span] = None):
+        if name is None and span is None:
+            raise ValueError('Variable(): name or span is required')
+        super().__init__(span)
         self.line_num = line_num
-        self.name = name
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        if self._name is None:
+            return self.span.text
+        return self._name
 
     def __repr__(self) -> str:
         return 'Variable({}, {})'.format(self.line_num, self.name)
 
 
-class Statement(ABC):
-    pass
+class Statement(Node, ABC):
+    __slots__ = ()
 
 
 class Assignment(Statement):
-
-    def __init__(self, line_num: int, variable: Variable, string: str):
+    # the literal is kept as an offset from the node start, so both are usually shared small ints
+    __slots__ = ('line_num', 'variable', '_string', 'string_offset', 'string_length')
+
+    def __init__(self, line_num: int, variable: Variable, string: Optional[str] = None,
+                 span: Optional[Span] = None, string_span: Optional[Span] = None):
+        if string is None and string_span is None:
+            raise ValueError('Assignment(): string or string_span is required')
+        super().__init__(span)
         self.line_num = line_num
         self.variable = variable
-        self.string = string
+        self._string = string
+        if string_span is None:
+            self.string_offset = self.string_length = None
+        else:
+            self.source = string_span.source
+            self.string_offset = string_span.start - (self.start or 0)
+            self.string_length = len(string_span)
+
+    @property
+    def string_span(self) -> Optional[Span]:
+        if self.string_offset is None:
+            return None
+        start = (self.start or 0) + self.string_offset
+        return Span(self.source, start, start + self.string_length)
+
+    @property
+    def string(self) -> str:
+        if self._string is None:
+            return self.string_span.text
+        return self._string
 
     def __repr__(self) -> str:
         return 'Assignment({}, {}, {})'.format(self.line_num, self.variable, self.string)
 
 
 class Print(Statement):
+    __slots__ = ('line_num', 'variable')
 
-    def __init__(self, line_num: int, variable: Variable):
+    def __init__(self, line_num: int, variable: Variable, span: Optional[Span] = None):
+        super().__init__(span)
         self.line_num = line_num
         self.variable = variable
 
@@ -38,9 +126,13 @@ class Print(Statement):
         return 'Print({}, {})'.format(self.line_num, self.variable)
 
 
-class SourceCode:
+class SourceCode(Node):
+    """the nodes read their text from the source, so a tree parsed from
+    map_source_file() must not outlive the mapping"""
+    __slots__ = ('line_num', 'statements')
 
-    def __init__(self, line_num: int, statements: List[Statement]):
+    def __init__(self, line_num: int, statements: List[Statement], span: Optional[Span] = None):
+        super().__init__(span)
         self.line_num = line_num
         self.statements = statements
 
@@ -48,13 +140,23 @@ class SourceCode:
         return 'SourceCode({}, {})'.format(self.line_num, self.statements)
 
 
-class Direction:
+class Direction(Node):
+    __slots__ = ('_direction',)
     direction_list = ('in', 'out')
 
-    def __init__(self, direction):
-        if direction.lower() not in self.direction_list:
+    def __init__(self, direction: Optional[str] = None, span: Optional[Span] = None):
+        if direction is None and span is None:
+            raise ValueError('Direction(): direction or span is required')
+        super().__init__(span)
+        self._direction = direction
+        if self.direction.lower() not in self.direction_list:
             raise ValueError
-        self.direction = direction
+
+    @property
+    def direction(self) -> str:
+        if self._direction is None:
+            return self.span.text
+        return self._direction
 
     def __repr__(self):
         return 'Direction({})'.format(self.direction)
@@ -64,20 +166,33 @@ class Direction:
 
 
 class Type(Statement):
+    __slots__ = ('_type',)
     type_list = ('integer', 'char')
 
-    def __init__(self, type):
-        if type.lower() not in self.type_list:
+    def __init__(self, type: Optional[str] = None, span: Optional[Span] = None):
+        if type is None and span is None:
+            raise ValueError('Type(): type or span is required')
+        super().__init__(span)
+        self._type = type
+        if self.type.lower() not in self.type_list:
             raise ValueError
-        self.type = type
+
+    @property
+    def type(self) -> str:
+        if self._type is None:
+            return self.span.text
+        return self._type
 
     def __repr__(self):
         return 'Type({})'.format(self.type)
 
 
 class Param(Statement):
+    __slots__ = ('line_num', 'variable', 'type', 'direction')
 
-    def __init__(self, line_num: int, variable: Variable, type: Type, direction: Direction):
+    def __init__(self, line_num: int, variable: Variable, type: Type, direction: Direction,
+                 span: Optional[Span] = None):
+        super().__init__(span)
         self.line_num = line_num
         self.variable = variable
         self.type = type
@@ -88,7 +203,10 @@ class Param(Statement):
 
 
 class Procedure(Statement):
-    def __init__(self, line_num: int, variable: Variable, params: List[Param]):
+    __slots__ = ('line_num', 'variable', 'params')
+
+    def __init__(self, line_num: int, variable: Variable, params: List[Param], span: Optional[Span] = None):
+        super().__init__(span)
         self.line_num = line_num
         self.variable = variable
         self.params = params
@@ -98,7 +216,10 @@ class Procedure(Statement):
 
 
 class VariableStatement(Statement):
-    def __init__(self, line_num: int, variable: Variable, type: Type):
+    __slots__ = ('line_num', 'variable', 'type')
+
+    def __init__(self, line_num: int, variable: Variable, type: Type, span: Optional[Span] = None):
+        super().__init__(span)
         self.line_num = line_num
         self.variable = variable
         self.type = type
@@ -108,7 +229,10 @@ class VariableStatement(Statement):
 
 
 class Begin(Statement):
-    def __init__(self, line_num):
+    __slots__ = ('line_num',)
+
+    def __init__(self, line_num, span: Optional[Span] = None):
+        super().__init__(span)
         self.line_num = line_num
 
     def __repr__(self):
@@ -116,7 +240,10 @@ class Begin(Statement):
 
 
 class Execute(Statement):
-    def __init__(self, line_num, sql):
+    __slots__ = ('line_num', 'sql')
+
+    def __init__(self, line_num, sql, span: Optional[Span] = None):
+        super().__init__(span)
         self.line_num = line_num
         self.sql = sql
 
@@ -125,7 +252,10 @@ class Execute(Statement):
 
 
 class End(Statement):
-    def __init__(self, line_num):
+    __slots__ = ('line_num',)
+
+    def __init__(self, line_num, span: Optional[Span] = None):
+        super().__init__(span)
         self.line_num = line_num
 
     def __repr__(self):
@@ -133,8 +263,11 @@ class End(Statement):
 
 
 class Ignored(Statement):
-    def __init__(self, line_num):
+    __slots__ = ('line_num',)
+
+    def __init__(self, line_num, span: Optional[Span] = None):
+        super().__init__(span)
         self.line_num = line_num
 
     def __repr__(self):
-        return '{} Ignored'.format(self.line_num)
\ No newline at end of file
+        return '{} Ignored'.format(self.line_num)
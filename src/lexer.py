@@ -1,6 +1,10 @@
+import mmap
 import re
+from contextlib import contextmanager
 from enum import Enum
-from typing import Tuple
+from typing import Iterator, Optional, Tuple, Union
+
+from src.definition import Span, SOURCE_ENCODING
 
 
 class LexerException(Exception):
@@ -61,6 +65,9 @@ KEYWORDS = {
 }
 
 
+KEYWORD_MAX_LENGTH = max(len(keyword) for keyword in KEYWORDS)
+
+
 TYPE = (TokenType.TOKEN_INTEGER,
         TokenType.TOKEN_CHAR)
 
@@ -69,12 +76,46 @@ DIRECTION = (TokenType.TOKEN_IN,
              TokenType.TOKEN_OUT)
 
 
+def compile_pattern(pattern: str) -> dict:
+    """compile once for both str and bytes sources"""
+    return {str: re.compile(pattern, flags=re.I),
+            bytes: re.compile(pattern.encode(SOURCE_ENCODING), flags=re.I)}
+
+
+NAME_PATTERN = compile_pattern(r'[_a-zA-Z][_a-zA-Z0-9]*')
+IGNORED_PATTERN = compile_pattern(r'[\t\n\v\f\r ]+')
+DIRECTION_PATTERN = compile_pattern(r'in|out')
+# '\r\n' and '\n\r' count as a single line break
+NEW_LINE_PATTERN = compile_pattern(r'\r\n|\n\r|\r|\n')
+
+
+@contextmanager
+def map_source_file(path: str) -> Iterator[Union[bytes, mmap.mmap]]:
+    """map the file read-only so AST spans can point into it without copying,
+    the spans are only readable until the mapping is closed on exit"""
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source_code:
+            yield source_code
+
+
 class TokenInfo:
+    __slots__ = ('line_num', 'token_type', '_token', 'span')
 
-    def __init__(self, line_num: int, token_type: TokenType, token: str):
+    def __init__(self, line_num: int, token_type: TokenType, token: Optional[str] = None,
+                 span: Optional[Span] = None):
         self.line_num = line_num
         self.token_type = token_type
-        self.token = token
+        self._token = token
+        self.span = span
+
+    @property
+    def token(self) -> str:
+        if self._token is None:
+            return self.span.text
+        return self._token
 
     def __repr__(self) -> Tuple[int, TokenType, str]:
         return str((self.line_num, self.token_type, self.token))
@@ -82,57 +123,77 @@ class TokenInfo:
 
 class Lexer:
 
-    def __init__(self, source_code: str):
+    def __init__(self, source_code: Union[str, bytes, mmap.mmap]):
+        # str, or bytes/mmap for the zero-copy mode with byte offsets
+        if not isinstance(source_code, (str, bytes, mmap.mmap)):
+            raise TypeError('Lexer(): unsupported source type {}'.format(type(source_code).__name__))
         self.source_code = source_code
+        self.binary = not isinstance(source_code, str)
         self.head = 0
         self.line_num = 1
         self.next_token_info = None
+        # end of the last non-ignored token handed to the parser
+        self.last_end = 0
+
+    def encode(self, text: str):
+        return text.encode(SOURCE_ENCODING) if self.binary else text
+
+    def pattern(self, patterns: dict):
+        return patterns[bytes if self.binary else str]
+
+    def char_at(self, index: int) -> str:
+        char = self.source_code[index]
+        return chr(char) if self.binary else char
+
+    def span(self, start: int, end: int) -> Span:
+        return Span(self.source_code, start, end)
 
     def next_source_code_is(self, prefix: str) -> bool:
-        return self.source_code[self.head:].startswith(prefix)
+        prefix = self.encode(prefix)
+        return self.source_code[self.head:self.head + len(prefix)] == prefix
 
     def finished(self) -> bool:
         return self.head >= len(self.source_code)
 
-    def scan_pattern(self, pattern) -> str:
-        # print(self.source_code[self.head:])
-        result = re.findall(pattern, self.source_code[self.head:], flags=re.I)
-        if len(result) != 1:
+    def scan_pattern(self, patterns: dict) -> Span:
+        pattern = self.pattern(patterns)
+        result = pattern.match(self.source_code, self.head)
+        if result is None:
             raise LexerException(
                 'scan_pattern(): returned unexpected result: {} for pattern {}'.format(
-                    result, pattern))
-        return result[0]
+                    result, pattern.pattern))
+        return self.span(*result.span())
 
-    def scan_name(self) -> str:
-        return self.scan_pattern(r'^[_a-zA-Z][_a-zA-Z0-9]*')
+    def scan_name(self) -> Span:
+        return self.scan_pattern(NAME_PATTERN)
 
-    def scan_ignored(self) -> str:
-        return self.scan_pattern(r'^[\t\n\v\f\r ]+')
+    def scan_ignored(self) -> Span:
+        return self.scan_pattern(IGNORED_PATTERN)
 
-    def scan_direction(self) -> str:
-        return self.scan_pattern(r'in|out')
+    def scan_direction(self) -> Span:
+        return self.scan_pattern(DIRECTION_PATTERN)
 
-    def scan_type(self) -> str:
+    def scan_type(self) -> Span:
         return self.scan_name()
 
-    def scan_before_token(self, token: str) -> str:
-        result = self.source_code[self.head:].split(token)
-        if len(result) <= 1:
+    def scan_before_token(self, token: str) -> Span:
+        end = self.source_code.find(self.encode(token), self.head)
+        if end < 0:
             raise LexerException("scan_before_token(): missing token {}".format(token))
-        self.head += len(result[0])
-        self.process_new_line(result[0])
-        return result[0]
-
-    def process_new_line(self, ignored) -> None:
-        i = 0
-        while i < len(ignored):
-            if ignored[i:][:2] in ['\r\n', '\n\r']:
-                i += 2
-                self.line_num += 1
-            else:
-                if ignored[i] in ['\r', '\n']:
-                    self.line_num += 1
-                i += 1
+        span = self.span(self.head, end)
+        self.head = end
+        self.last_end = end
+        self.process_new_line(span)
+        return span
+
+    def process_new_line(self, ignored: Span) -> None:
+        for _ in self.pattern(NEW_LINE_PATTERN).finditer(self.source_code, ignored.start, ignored.end):
+            self.line_num += 1
+
+    def make_token(self, token_type: TokenType, token: str) -> TokenInfo:
+        span = self.span(self.head, self.head + len(self.encode(token)))
+        self.head = span.end
+        return TokenInfo(self.line_num, token_type, token, span)
 
     def get_next_token(self) -> TokenInfo:
         # next token info already loaded
@@ -143,55 +204,45 @@ class Lexer:
 
         # load next token
         if self.finished():
-            return TokenInfo(self.line_num, TokenType.TOKEN_EOF, 'EOF')
+            return TokenInfo(self.line_num, TokenType.TOKEN_EOF, 'EOF', self.span(self.head, self.head))
         
-        next_chr = self.source_code[self.head]
+        next_chr = self.char_at(self.head)
         if next_chr == '$':
-            self.head += 1
-            return TokenInfo(self.line_num, TokenType.TOKEN_VAR_PREFIX, '$')
+            return self.make_token(TokenType.TOKEN_VAR_PREFIX, '$')
         if next_chr == '(':
-            self.head += 1
-            return TokenInfo(self.line_num, TokenType.TOKEN_LEFT_PAREN, '(')
+            return self.make_token(TokenType.TOKEN_LEFT_PAREN, '(')
         if next_chr == ')':
-            self.head += 1
-            return TokenInfo(self.line_num, TokenType.TOKEN_RIGHT_PAREN, ')')
+            return self.make_token(TokenType.TOKEN_RIGHT_PAREN, ')')
         if next_chr == '=':
-            self.head += 1
-            return TokenInfo(self.line_num, TokenType.TOKEN_EQUAL, '=')
+            return self.make_token(TokenType.TOKEN_EQUAL, '=')
         if next_chr == '"':
             if self.next_source_code_is('""'):
-                self.head += 2
-                return TokenInfo(self.line_num, TokenType.TOKEN_DUOQUOTE, '""')
+                return self.make_token(TokenType.TOKEN_DUOQUOTE, '""')
             if self.next_source_code_is("''"):
-                self.head += 2
-                return TokenInfo(self.line_num, TokenType.TOKEN_DUOSINGLEQUOTE, "''")
-            self.head += 1
-            return TokenInfo(self.line_num, TokenType.TOKEN_QUOTE, '"')
+                return self.make_token(TokenType.TOKEN_DUOSINGLEQUOTE, "''")
+            return self.make_token(TokenType.TOKEN_QUOTE, '"')
         if next_chr == "'":
-            self.head += 1
-            return TokenInfo(self.line_num, TokenType.TOKEN_SINGLEQUOTE, "'")
+            return self.make_token(TokenType.TOKEN_SINGLEQUOTE, "'")
         if next_chr == '_' or next_chr.isalpha():
             name = self.scan_name()
-            if name.lower() in KEYWORDS:
-                self.head += len(name)
-                return TokenInfo(self.line_num, KEYWORDS[name.lower()], name)
-            self.head += len(name)
-            return TokenInfo(self.line_num, TokenType.TOKEN_NAME, name)
+            self.head = name.end
+            token_type = TokenType.TOKEN_NAME
+            # only names short enough to be a keyword get decoded here
+            if len(name) <= KEYWORD_MAX_LENGTH:
+                token_type = KEYWORDS.get(name.text.lower(), TokenType.TOKEN_NAME)
+            return TokenInfo(self.line_num, token_type, span=name)
         if next_chr in ['\t', '\n', '\v', '\f', '\r', ' ']:
             ignored = self.scan_ignored()
             line_num = self.line_num
-            self.head += len(ignored)
+            self.head = ignored.end
             self.process_new_line(ignored)
-            return TokenInfo(line_num, TokenType.TOKEN_IGNORED, ignored)
+            return TokenInfo(line_num, TokenType.TOKEN_IGNORED, span=ignored)
         if next_chr == ',':
-            self.head += 1
-            return TokenInfo(self.line_num, TokenType.TOKEN_COMMA, ',')
+            return self.make_token(TokenType.TOKEN_COMMA, ',')
         if next_chr == ':':
-            self.head += 1
-            return TokenInfo(self.line_num, TokenType.TOKEN_COLON, ':')
+            return self.make_token(TokenType.TOKEN_COLON, ':')
         if next_chr == ';':
-            self.head += 1
-            return TokenInfo(self.line_num, TokenType.TOKEN_SEMICOLON, ';')
+            return self.make_token(TokenType.TOKEN_SEMICOLON, ';')
         
         raise LexerException('get_next_token(): unexpected symbol {}'.format(next_chr))
 
@@ -201,8 +252,14 @@ class Lexer:
             raise LexerException(
                 'next_token_is(): syntax error near {}, expecting {} but got {}'.format(
                     next_token_info.token, guess, next_token_info))
+        if guess != TokenType.TOKEN_IGNORED:
+            self.last_end = next_token_info.span.end
         return next_token_info
 
+    def next_token_start(self) -> int:
+        self.look_ahead()
+        return self.next_token_info.span.start
+
     def look_ahead(self) -> TokenType:
         # print(self.next_token_info)
         if self.next_token_info is None:
@@ -3,7 +3,7 @@ from typing import List
 
 from src.definition import Variable, Statement, Assignment, Print, \
     SourceCode, Procedure, Param, Type, Direction, VariableStatement, \
-    Begin, Execute, End, Ignored
+    Begin, Execute, End, Ignored, Span
 from src.lexer import TokenType, Lexer, DIRECTION, TYPE
 
 
@@ -23,27 +23,28 @@ def parse_comma(lexer: Lexer) -> None:
 
 def parse_variable(lexer: Lexer) -> Variable:
     line_num = lexer.next_token_is(TokenType.TOKEN_VAR_PREFIX).line_num
-    name = lexer.next_token_is(TokenType.TOKEN_NAME).token
+    name = lexer.next_token_is(TokenType.TOKEN_NAME)
     parse_ignored(lexer)
-    return Variable(line_num, name)
+    return Variable(line_num, span=name.span)
 
 
 def parse_variable2(lexer: Lexer) -> Variable:
     if lexer.look_ahead() == TokenType.TOKEN_NAME:
         token_info = lexer.next_token_is(TokenType.TOKEN_NAME)
         parse_ignored(lexer)
-        return Variable(token_info.line_num, token_info.token)
+        return Variable(token_info.line_num, span=token_info.span)
     else:
         raise ParseException('parse_variable2(): unexpected direction {}'.format(lexer.look_ahead()))
 
 
-def parse_string(lexer: Lexer) -> str:
+def parse_string(lexer: Lexer) -> Span:
+    """span of the string literal without its quotes"""
     if lexer.look_ahead() == TokenType.TOKEN_DUOQUOTE:
-        lexer.next_token_is(TokenType.TOKEN_DUOQUOTE)
-        return ''
+        start = lexer.next_token_is(TokenType.TOKEN_DUOQUOTE).span.start + 1
+        return lexer.span(start, start)
     if lexer.look_ahead() == TokenType.TOKEN_DUOSINGLEQUOTE:
-        lexer.next_token_is(TokenType.TOKEN_DUOSINGLEQUOTE)
-        return ''
+        start = lexer.next_token_is(TokenType.TOKEN_DUOSINGLEQUOTE).span.start + 1
+        return lexer.span(start, start)
     if lexer.look_ahead() == TokenType.TOKEN_SINGLEQUOTE:
         lexer.next_token_is(TokenType.TOKEN_SINGLEQUOTE)
         string = lexer.scan_before_token("'")
@@ -56,13 +57,15 @@ def parse_string(lexer: Lexer) -> str:
 
 
 def parse_assignment(lexer: Lexer) -> Assignment:
+    start = lexer.next_token_start()
     var = parse_variable(lexer)
     parse_ignored(lexer)
     lexer.next_token_is(TokenType.TOKEN_EQUAL)
     parse_ignored(lexer)
     string = parse_string(lexer)
+    span = lexer.span(start, lexer.last_end)
     parse_ignored(lexer)
-    return Assignment(var.line_num, var, string)
+    return Assignment(var.line_num, var, span=span, string_span=string)
 
 
 def parse_assignment2(lexer: Lexer) -> Assignment:
@@ -72,8 +75,9 @@ def parse_assignment2(lexer: Lexer) -> Assignment:
     lexer.next_token_is(TokenType.TOKEN_EQUAL)
     parse_ignored(lexer)
     string = parse_string(lexer)
+    span = lexer.span(var.span.start, lexer.last_end)
     parse_ignored(lexer)
-    return Assignment(var.line_num, var, string)
+    return Assignment(var.line_num, var, span=span, string_span=string)
 
 
 def parse_statement2(lexer: Lexer) -> Statement:
@@ -83,30 +87,33 @@ def parse_statement2(lexer: Lexer) -> Statement:
     if lexer.look_ahead() in TYPE:
         type = parse_type(lexer)
         lexer.next_token_is(TokenType.TOKEN_SEMICOLON)
+        span = lexer.span(var.span.start, lexer.last_end)
         parse_ignored(lexer)
-        return VariableStatement(var.line_num, var, type)
+        return VariableStatement(var.line_num, var, type, span)
     if lexer.look_ahead() == TokenType.TOKEN_COLON:
         lexer.next_token_is(TokenType.TOKEN_COLON)
         lexer.next_token_is(TokenType.TOKEN_EQUAL)
         string = parse_string(lexer)
         lexer.next_token_is(TokenType.TOKEN_SEMICOLON)
+        span = lexer.span(var.span.start, lexer.last_end)
         parse_ignored(lexer)
-        return Assignment(var.line_num, var, string)
+        return Assignment(var.line_num, var, span=span, string_span=string)
 
 
 def parse_print(lexer: Lexer) -> Print:
-    line_num = lexer.next_token_is(TokenType.TOKEN_PRINT).line_num
+    token_info = lexer.next_token_is(TokenType.TOKEN_PRINT)
     lexer.next_token_is(TokenType.TOKEN_LEFT_PAREN)
     parse_ignored(lexer)
     variable = parse_variable(lexer)
     parse_ignored(lexer)
     lexer.next_token_is(TokenType.TOKEN_RIGHT_PAREN)
+    span = lexer.span(token_info.span.start, lexer.last_end)
     parse_ignored(lexer)
-    return Print(line_num, variable)
+    return Print(token_info.line_num, variable, span)
 
 
 def parse_procedure(lexer: Lexer) -> Procedure:
-    lexer.next_token_is(TokenType.TOKEN_CREATE)
+    start = lexer.next_token_is(TokenType.TOKEN_CREATE).span.start
     parse_ignored(lexer)
     lexer.next_token_is(TokenType.TOKEN_OR)
     parse_ignored(lexer)
@@ -122,8 +129,9 @@ def parse_procedure(lexer: Lexer) -> Procedure:
     parse_ignored(lexer)
     # lexer.next_token_is(TokenType.TOKEN_COLON)
     lexer.next_token_is(TokenType.TOKEN_IS)
+    span = lexer.span(start, lexer.last_end)
     parse_ignored(lexer)
-    return Procedure(lin_num, variable, params)
+    return Procedure(lin_num, variable, params, span)
 
 
 def parse_params(lexer: Lexer) -> List[Param]:
@@ -142,51 +150,54 @@ def parse_param(lexer: Lexer) -> Param:
     type = parse_type(lexer)
     parse_ignored(lexer)
     directon = parse_direction(lexer)
-    return Param(variable.line_num, variable, type, directon)
+    span = lexer.span(variable.span.start, lexer.last_end)
+    return Param(variable.line_num, variable, type, directon, span)
 
 
 def parse_type(lexer: Lexer) -> Type:
     if lexer.look_ahead() == TokenType.TOKEN_INTEGER:
-        type = lexer.next_token_is(TokenType.TOKEN_INTEGER).token
+        token_info = lexer.next_token_is(TokenType.TOKEN_INTEGER)
     elif lexer.look_ahead() == TokenType.TOKEN_CHAR:
-        type = lexer.next_token_is(TokenType.TOKEN_CHAR).token
+        token_info = lexer.next_token_is(TokenType.TOKEN_CHAR)
     else:
         raise ParseException('parse_direction(): unexpected type {}'.format(lexer.look_ahead()))
-    return Type(type)
+    return Type(span=token_info.span)
 
 
 def parse_direction(lexer: Lexer) -> Direction:
     if lexer.look_ahead() == TokenType.TOKEN_IN:
-        direction = lexer.next_token_is(TokenType.TOKEN_IN).token
+        token_info = lexer.next_token_is(TokenType.TOKEN_IN)
     elif lexer.look_ahead() == TokenType.TOKEN_OUT:
-        direction = lexer.next_token_is(TokenType.TOKEN_OUT).token
+        token_info = lexer.next_token_is(TokenType.TOKEN_OUT)
     else:
         raise ParseException('parse_direction(): unexpected direction {}'.format(lexer.look_ahead()))
-    return Direction(direction)
+    return Direction(span=token_info.span)
 
 
 def parse_begin(lexer: Lexer) -> Begin:
-    line_num = lexer.next_token_is(TokenType.TOKEN_BEGIN).line_num
-    return Begin(line_num)
+    token_info = lexer.next_token_is(TokenType.TOKEN_BEGIN)
+    return Begin(token_info.line_num, token_info.span)
 
 
 def parse_execute(lexer: Lexer) -> Execute:
-    line_num = lexer.next_token_is(TokenType.TOKEN_EXECUTE).line_num
+    token_info = lexer.next_token_is(TokenType.TOKEN_EXECUTE)
     parse_ignored(lexer)
     lexer.next_token_is(TokenType.TOKEN_IMMEDIATE)
     parse_ignored(lexer)
     sql = parse_variable2(lexer)
     lexer.next_token_is(TokenType.TOKEN_SEMICOLON)
+    span = lexer.span(token_info.span.start, lexer.last_end)
     parse_ignored(lexer)
-    return Execute(line_num, sql)
+    return Execute(token_info.line_num, sql, span)
 
 
 def parse_end(lexer: Lexer) -> End:
-    line_num = lexer.next_token_is(TokenType.TOKEN_END).line_num
+    token_info = lexer.next_token_is(TokenType.TOKEN_END)
     lexer.scan_before_token(';')
     lexer.next_token_is(TokenType.TOKEN_SEMICOLON)
+    span = lexer.span(token_info.span.start, lexer.last_end)
     parse_ignored(lexer)
-    return End(line_num)
+    return End(token_info.line_num, span)
 
 
 def parse_statement(lexer: Lexer) -> Statement:
@@ -201,8 +212,8 @@ def parse_statement(lexer: Lexer) -> Statement:
     if lexer.look_ahead() == TokenType.TOKEN_BEGIN:
         return parse_begin(lexer)
     if lexer.look_ahead() == TokenType.TOKEN_IGNORED:
-        parse_ignored(lexer)
-        return Ignored(lexer.line_num)
+        token_info = lexer.next_token_is(TokenType.TOKEN_IGNORED)
+        return Ignored(lexer.line_num, token_info.span)
     if lexer.look_ahead() == TokenType.TOKEN_EXECUTE:
         return parse_execute(lexer)
     if lexer.look_ahead() == TokenType.TOKEN_END:
@@ -217,4 +228,4 @@ def parse(lexer: Lexer) -> SourceCode:
         statements.append(parse_statement(lexer))
     for i in statements:
         print(i)
-    return SourceCode(line_num, statements)
+    return SourceCode(line_num, statements, lexer.span(0, len(lexer.source_code)))
@@ -0,0 +1,112 @@
+import contextlib
+import gc
+import io
+import os
+import tracemalloc
+
+import pytest
+
+from src.definition import Assignment, Variable, VariableStatement
+from src.lexer import Lexer, map_source_file
+from src.parser import parse
+
+TEST_SQL = os.path.join(os.path.dirname(__file__), '..', 'src', 'test.sql')
+
+
+def spans(statement):
+    result = [(statement.span.start, statement.span.end)]
+    for name in ('variable', 'sql', 'type', 'direction'):
+        node = getattr(statement, name, None)
+        if node is not None and hasattr(node, 'span'):
+            result.append((node.span.start, node.span.end))
+    for param in getattr(statement, 'params', []):
+        result.extend(spans(param))
+    return result
+
+
+def test_str_and_bytes_give_same_tree():
+    with open(TEST_SQL, 'rb') as f:
+        source_code = f.read()
+    text_ast = parse(Lexer(source_code.decode('utf-8')))
+    byte_ast = parse(Lexer(source_code))
+    assert repr(text_ast) == repr(byte_ast)
+    for text_statement, byte_statement in zip(text_ast.statements, byte_ast.statements):
+        assert spans(text_statement) == spans(byte_statement)
+        assert text_statement.span.text == byte_statement.span.text
+
+
+def test_mapped_file_gives_same_tree():
+    with open(TEST_SQL) as f:
+        text_ast = parse(Lexer(f.read()))
+    with map_source_file(TEST_SQL) as source_code:
+        byte_ast = parse(Lexer(source_code))
+        assert repr(text_ast) == repr(byte_ast)
+        assert byte_ast.statements[0].span.text.startswith('CREATE OR REPLACE Procedure Test(')
+
+
+def test_line_breaks():
+    source_code = 'A char;\r\nB char;\n\rC char;\r\rD :="x\r\ny";\nE char;'
+    for lexer in (Lexer(source_code), Lexer(source_code.encode('utf-8'))):
+        statements = [i for i in parse(lexer).statements if isinstance(i, (Assignment, VariableStatement))]
+        assert [i.variable.name for i in statements] == ['A', 'B', 'C', 'D', 'E']
+        assert [i.line_num for i in statements] == [1, 2, 3, 5, 7]
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.sql'
+    path.write_bytes(b'')
+    with map_source_file(str(path)) as source_code:
+        ast = parse(Lexer(source_code))
+    assert ast.statements == []
+    assert (ast.span.start, ast.span.end) == (0, 0)
+
+
+def test_non_ascii_string_uses_byte_offsets(tmp_path):
+    path = tmp_path / 'utf8.sql'
+    path.write_bytes('V :="héllo";\nY char;'.encode('utf-8'))
+    with map_source_file(str(path)) as source_code:
+        assignment, statement = parse(Lexer(source_code)).statements
+        assert assignment.string == 'héllo'
+        assert (assignment.string_span.start, assignment.string_span.end) == (5, 11)
+        assert (statement.span.start, statement.span.end) == (14, 21)
+        assert statement.line_num == 2
+    text_statement = parse(Lexer('V :="héllo";\nY char;')).statements[-1]
+    assert (text_statement.span.start, text_statement.span.end) == (13, 20)
+
+
+def test_closed_mapping(tmp_path):
+    path = tmp_path / 'closed.sql'
+    path.write_bytes(b'V :="x";\n')
+    with map_source_file(str(path)) as source_code:
+        ast = parse(Lexer(source_code))
+    with pytest.raises(ValueError, match='source mapping is closed'):
+        ast.statements[0].variable.name
+    with pytest.raises(ValueError, match='source mapping is closed'):
+        repr(ast)
+
+
+def test_text_or_span_required():
+    with pytest.raises(ValueError):
+        Variable(1)
+    with pytest.raises(ValueError):
+        Assignment(1, Variable(1, 'V'))
+
+
+def traced_size(build):
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def test_span_tree_smaller_than_string_copies():
+    count = 3000
+    lexer = Lexer(b'$abcdef = "hello world value"\n' * count)
+    ast, span_size = traced_size(lambda: parse(lexer))
+    _, copy_size = traced_size(lambda: [
+        Assignment(i.line_num, Variable(i.line_num, i.variable.name), i.string) for i in ast.statements])
+    assert span_size / count <= copy_size / count